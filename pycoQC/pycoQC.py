@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
 # Standard library imports
-from os import path
+from os import path, remove, replace
 from sys import exit as sysexit
-from collections import OrderedDict, namedtuple, deque
+from collections import OrderedDict, namedtuple
 
 # Third party imports
 try:
@@ -27,6 +27,96 @@ except (NameError, ImportError) as E:
         print ("Can not import a local packages. Please verify source code directory")
         sysexit()
 
+##~~~~~~~ CONSTANTS ~~~~~~~#
+
+# Explicit downcast dtypes for the numeric fields of a sequencing_summary file. Using 32 bit
+# types instead of the 64 bit ones inferred by pandas shrinks the dataframe several fold in
+# memory. Fields absent from the file are simply ignored by read_csv. Integer fields are parsed
+# as floats, since an integer dtype makes read_csv fail on the incomplete rows that dropna cleans
+# afterwards; they are downcast to integers once the cleanup is done
+DTYPES = {
+    "channel": np.float32,
+    "start_time": np.float32,
+    "duration": np.float32,
+    "num_events": np.float32,
+    "sequence_length_template": np.float32,
+    "mean_qscore_template": np.float32,
+    "sequence_length_2d": np.float32,
+    "mean_qscore_2d": np.float32,
+    }
+
+# Integer dtypes applied to the fields above after the incomplete rows have been dropped
+INT_DTYPES = {
+    "channel": np.int16,
+    "num_events": np.int32,
+    "sequence_length_template": np.int32,
+    "sequence_length_2d": np.int32,
+    }
+
+##~~~~~~~ PRIVATE FUNCTIONS ~~~~~~~#
+
+_numba_bin_counts = None
+
+def _get_numba_bin_counts ():
+    """
+    Compile once and return a numba kernel fusing the start time discretization and the per bin
+    accumulation of output_over_time in a single parallel pass, using per-thread partial sums
+    reduced at the end. Numba is an optional dependency, so an ImportError is raised and handled
+    by the caller if it is not installed
+    """
+    global _numba_bin_counts
+    if _numba_bin_counts is None:
+        from numba import njit, prange, get_num_threads
+
+        @njit (parallel=True, cache=True)
+        def bin_counts_kernel (start, weights, bin_size, nbins, use_weights, nt):
+            n = len(start)
+            chunk = (n+nt-1)//nt
+            partial = np.zeros((nt, nbins))
+            for t in prange(nt):
+                for i in range(t*chunk, min(n, (t+1)*chunk)):
+                    b = int(start[i]//bin_size)
+                    if 0 <= b < nbins:
+                        partial[t, b] += weights[i] if use_weights else 1.0
+            return partial.sum(axis=0)
+
+        # The thread count is resolved outside the jitted body and passed as an argument: calling
+        # get_num_threads inside it counts as a dynamic global and prevents on-disk kernel caching
+        def bin_counts (start, weights, bin_size, nbins, use_weights):
+            return bin_counts_kernel(start, weights, bin_size, nbins, use_weights, get_num_threads())
+
+        _numba_bin_counts = bin_counts
+    return _numba_bin_counts
+
+_numba_bin_stats = None
+
+def _get_numba_bin_stats ():
+    """
+    Compile once and return a numba kernel computing median/min/max/q1/q3 per time window, given a
+    qscore array sorted by window id and the window offsets. Numba is an optional dependency, so an
+    ImportError is raised and handled by the caller if it is not installed
+    """
+    global _numba_bin_stats
+    if _numba_bin_stats is None:
+        from numba import njit, prange
+
+        @njit (parallel=True, cache=True)
+        def bin_stats (q, offsets):
+            out = np.full((len(offsets)-1, 5), np.nan)
+            for i in prange(len(offsets)-1):
+                seg = np.sort(q[offsets[i]:offsets[i+1]])
+                n = len(seg)
+                if n > 0:
+                    out[i,0] = seg[n//2] if n%2 else (seg[n//2-1]+seg[n//2])/2
+                    out[i,1] = seg[0]
+                    out[i,2] = seg[-1]
+                    out[i,3] = seg[int(0.25*(n-1))]
+                    out[i,4] = seg[int(0.75*(n-1))]
+            return out
+
+        _numba_bin_stats = bin_stats
+    return _numba_bin_stats
+
 ##~~~~~~~ MAIN CLASS ~~~~~~~#
 class pycoQC():
 
@@ -38,17 +128,18 @@ class pycoQC():
         """
         # Function specific import to avoid crashing the entire package if not available
         from pkg_resources import resource_filename
-        df = pd.DataFrame(columns=["path", "description"])
         package_data_path = resource_filename("pycoQC", 'data')
 
-        # Store all file paths in a df and return it
+        # Collect all file paths and build the df in a single shot rather than row by row
+        rows = []
+        names = []
         for run_type, albacore_version in [["1D_DNA", "1.2.1"], ["1D_RNA", "2.0.1"], ["1D2_DNA", "1.2.1"]]:
             fp = path.join(package_data_path, "sequencing_summary_{}_Albacore_{}.txt".format(run_type, albacore_version))
             dscr = "Sequencing summary file generated by a {} run basecalled by Albacore {}".format(run_type, albacore_version)
-            name = "{}_{}".format(run_type, albacore_version)
             is_readable_file(fp, raise_exception=True)
-            df.loc[name] = (fp, dscr)
-        return df
+            rows.append((fp, dscr))
+            names.append("{}_{}".format(run_type, albacore_version))
+        return pd.DataFrame(rows, index=names, columns=["path", "description"])
 
     #~~~~~~~FUNDAMENTAL METHODS~~~~~~~#
     def __init__ (self,
@@ -58,6 +149,7 @@ class pycoQC():
         filter_zero_len = False,
         filter_fail = False,
         filter_calibration = False,
+        parquet_cache = True,
         verbose=False, **kwargs):
         """
         Parse Albacore sequencing_summary.txt file and clean-up the data
@@ -77,15 +169,66 @@ class pycoQC():
         * filter_calibration: BOOL [Default False]
             If True, sequenced flagged as aligned on the calibration will be filtered out of all subsequent analysis
             (only compatible with albacore 2.0+)
+        * parquet_cache: BOOL [Default True]
+            If True, the parsed dataframe is cached on disk in parquet format next to the summary file and
+            reloaded by subsequent instantiations instead of re-parsing the whole text file (requires pyarrow)
         """
         # Import the summary file in a dataframe
         if verbose: jprint("Importing data", bold=True)
         self.seq_summary_file = seq_summary_file
-        self.df = pd.read_csv(seq_summary_file, sep ="\t")
+        # Transparent on-disk parquet cache keyed by the size and mtime of the summary file. After
+        # the first parse, subsequent instantiations load the columnar file instead of re-parsing
+        # the whole tab separated text file
+        cache_file = None
+        if parquet_cache:
+            cache_file = "{}.{}.{}.parquet".format(seq_summary_file,
+                path.getsize(seq_summary_file), int(path.getmtime(seq_summary_file)))
+
+        self.df = None
+        if cache_file and path.isfile(cache_file):
+            try:
+                self.df = pd.read_parquet(cache_file, engine="pyarrow")
+            except Exception:
+                # A corrupted or truncated cache is deleted and the text file re-parsed
+                try:
+                    remove(cache_file)
+                except OSError:
+                    pass
+
+        if self.df is None:
+            # Favor the multithreaded pyarrow parsing engine and fall back on the default single
+            # threaded C engine if pyarrow is not installed or the pandas version is too old
+            try:
+                self.df = pd.read_csv(seq_summary_file, sep ="\t", dtype=DTYPES, engine="pyarrow")
+            except (ImportError, ValueError):
+                self.df = pd.read_csv(seq_summary_file, sep ="\t", dtype=DTYPES)
+            # Write the cache for the next instantiation through a temporary file moved in place
+            # atomically, so an interrupted run never leaves a half written cache under a valid
+            # key. Silently skip it if pyarrow is missing or the directory is not writable
+            if cache_file:
+                try:
+                    self.df.to_parquet(cache_file+".tmp", engine="pyarrow")
+                    replace(cache_file+".tmp", cache_file)
+                except Exception:
+                    pass
+
+        # Restrict to the requested runids straight away so the dropna scan and all subsequent
+        # per-column passes only touch the reads that will actually be analysed
+        if runid_list:
+            self.df = self.df[(self.df["run_id"].isin(runid_list))]
+            assert len(self.df) > 0, "No valid read left after runid filtering"
         self.df.dropna(inplace=True)
         if verbose: jprint("\t{} reads found in initial file".format(len(self.df)))
         assert len(self.df) > 0, "No valid read found in input file"
 
+        # Cast run_id to categorical, which stores integer codes instead of repeated python strings
+        self.df["run_id"] = self.df["run_id"].astype("category")
+
+        # Downcast the integer fields parsed as floats, now that the incomplete rows are gone
+        for col, dtype in INT_DTYPES.items():
+            if col in self.df:
+                self.df[col] = self.df[col].astype(dtype)
+
         # Define specific parameters depending on the run_type
         if verbose: jprint("Verify and rearrange fields", bold=True)
         if run_type == "1D" or (not run_type and "sequence_length_template" in self.df):
@@ -147,27 +290,53 @@ class pycoQC():
         # Filter/reorder runids
         if verbose: jprint ("Order run IDs by start time", bold = True)
         # Get the runids in the file order if not given
-        if runid_list:
-            self.df = self.df[(self.df["run_id"].isin(runid_list))]
-            assert len(self.df) > 0, "No valid read left after runid filtering"
-        else:
+        if not runid_list:
             runid_list = self.df["run_id"].unique()
 
-        # Modify start time per run ids to order them following the runid_list
+        # Modify start time per run ids to order them following the runid_list. The boolean mask
+        # is computed only once per runid by comparing the integer category codes, a pure
+        # vectorized comparison with no string dispatch. The shift of the first runid, which is
+        # always an addition of 0 touching every selected row, is skipped entirely
+        codes = self.df["run_id"].cat.codes.values
+        categories = self.df["run_id"].cat.categories
         increment_time = 0
         self.runid_start = OrderedDict()
         for runid in runid_list:
             if verbose: jprint ("\tProcessing reads with Run_ID {}".format(runid))
-            max_val = self.df['start_time'][self.df["run_id"] == runid].max()
-            self.df.loc[self.df["run_id"] == runid, 'start_time'] += increment_time
+            mask = (codes == categories.get_loc(runid))
+            max_val = self.df['start_time'].values[mask].max()
+            if increment_time:
+                self.df.loc[mask, 'start_time'] += increment_time
             self.runid_start[runid] = increment_time
             increment_time += max_val+1
 
         # Final cleanup
         if verbose: jprint("Reindex and sort", bold=True)
         self.df.sort_values("start_time", inplace=True)
-        self.df.reset_index(drop=True, inplace=True)
         self.df.set_index("read_id", inplace=True)
+
+        # Precompute the start time in hours once and for all, as the time series plotting methods
+        # would otherwise rederive it from the raw seconds on every call. Evaluate with the
+        # multithreaded SIMD numexpr engine if available, else with a plain numpy multiplication
+        # by the precomputed reciprocal
+        s = self.df["start_time"].values
+        try:
+            import numexpr as ne
+            start_time_h = ne.evaluate("s * (1.0/3600.0)")
+        except ImportError:
+            start_time_h = s * np.float32(1.0/3600.0)
+
+        # Snapshot the hot numeric columns as contiguous numpy arrays (structure of arrays), so
+        # the plotting methods can bypass the pandas block manager on every call. The dataframe is
+        # kept for the table displays and ad-hoc slicing
+        self._start_time_h = start_time_h.astype(np.float32, copy=False)
+        self._qscore = np.ascontiguousarray(self.df["mean_qscore"].values)
+        self._seqlen = np.ascontiguousarray(self.df["num_bases"].values)
+        self._seqlen_max = int(self._seqlen.max())
+        self._start_time = np.ascontiguousarray(self.df["start_time"].values)
+        self._channel = self.df["channel"].values.astype(np.int32)
+        self._num_events = np.ascontiguousarray(self.df["num_events"].values) if "num_events" in self.df else None
+
         self.total_reads = len(self.df)
         if verbose: jprint("\t{} Total valid reads found".format(self.total_reads))
 
@@ -198,19 +367,25 @@ class pycoQC():
         """
         # Display general counts table
         jprint ("Overall counts", bold=True)
-        df = pd.DataFrame(columns=["Count"])
-        df.loc["Reads", "Count"] = len(self.df)
-        df.loc["Bases", "Count"] = self.df["num_bases"].sum()
+        # Collect the counts first and build the df in a single shot rather than row by row
+        d = OrderedDict()
+        d["Reads"] = len(self.df)
+        d["Bases"] = self.df["num_bases"].sum()
         if "num_events" in self.df:
-            df.loc["Events", "Count"] = self.df["num_events"].sum()
-        df.loc["Active Channels", "Count"] = self.df["channel"].nunique()
-        df.loc["Run Duration (h)", "Count"] = (self.df["start_time"].max()-self.df["start_time"].min())/3600
+            d["Events"] = self.df["num_events"].sum()
+        d["Active Channels"] = self.df["channel"].nunique()
+        d["Run Duration (h)"] = (self.df["start_time"].max()-self.df["start_time"].min())/3600
+        df = pd.DataFrame(list(d.values()), index=list(d.keys()), columns=["Count"], dtype=object)
         display(df)
 
         # Display counts per runid table
         jprint ("\nRead count per Run ID", bold=True)
-        df = self.df["run_id"].value_counts().to_frame()
-        df.columns = ["reads"]
+        # run_id is categorical, so counting the integer codes with bincount runs in a single
+        # vectorized pass rather than hashing the run id strings with value_counts
+        runid_cat = self.df["run_id"].cat
+        counts = np.bincount(runid_cat.codes.values, minlength=len(runid_cat.categories))
+        df = pd.DataFrame({"reads": counts}, index=runid_cat.categories)
+        df.sort_values("reads", ascending=False, inplace=True)
         display(df)
 
         # Display distribution table
@@ -302,45 +477,36 @@ class pycoQC():
         => Return
             A fig + axes tuple for further user customisation (http://matplotlib.org/api/axes_api.html)
         """
-        # Compute the count per channel
+        # Compute the count per channel with a single bincount pass instead of hashing the values
+        # with value_counts or groupby. Channels are bounded integers in [1, 512], so a weighted
+        # bincount does the per-channel sum, zero filling and ordering in one operation
         if level == "reads":
-            s = self.df["channel"].value_counts(sort=False)
+            a = np.bincount(self._channel, minlength=513)[1:513]
             title = "Reads per channels"
-        if level == "bases":
-            s = self.df.groupby("channel").aggregate(np.sum)["num_bases"]
+        elif level == "bases":
+            a = np.bincount(self._channel, weights=self._seqlen, minlength=513).astype(np.int64)[1:513]
             title = "Bases per channels"
-        if level == "events":
-            if not "num_events" in self.df:
+        elif level == "events":
+            if self._num_events is None:
                 jprint ("events number information not available in the source file")
                 return (None, None)
-            s = self.df.groupby("channel").aggregate(np.sum)["num_events"]
+            a = np.bincount(self._channel, weights=self._num_events, minlength=513).astype(np.int64)[1:513]
             title = "Events per channels"
 
-        # Fill the missing values
-        for i in range(1, 513):
-            if i not in s.index:
-                s.loc[i] = 0
-
-        # Sort by index value
-        s.sort_index(inplace=True)
-
-        # Reshape the series to a 2D frame similar to the Nanopore flowcell grid
-        a = s.values.reshape(16,32)
+        # Reshape to a 2D array similar to the Nanopore flowcell grid
+        a = a.reshape(16,32)
 
         with pl.style.context(plot_style):
             # Plot a heatmap
             fig, ax = pl.subplots(figsize=figsize)
-            ax = sns.heatmap(a, ax=ax, annot=annot, fmt=fmt, linewidths=2, cbar=cbar, cmap=cmap,
-                alpha=alpha, robust=robust)
+            ax = sns.heatmap(a, ax=ax, annot=annot, fmt=fmt, annot_kws={"size":8}, linewidths=2,
+                cbar=cbar, cmap=cmap, alpha=alpha, robust=robust)
 
             # Tweak the plot
             t = ax.set_title (title)
             t = ax.set_xticklabels("")
             t = ax.set_yticklabels("")
 
-            for text in ax.texts:
-                text.set_size(8)
-
         return (fig, ax)
 
     def reads_qual_distribution (self,
@@ -356,7 +522,7 @@ class pycoQC():
         plot_style = "ggplot",
         **kwargs):
         """
-        Plot the univariate kernel density estimate of mean read quality
+        Plot the distribution of mean read quality
         * figsize: LIST [Default [30,7]]
             Size of ploting area
         * color: STR [Default "orangered"]
@@ -365,9 +531,9 @@ class pycoQC():
         * alpha: FLOAT [Default 0.5 0.5]
             Opacity of the area from 0 to 1
         * bandwith: FLOAT [Default 0.1]
-            Size of the quality score bandwith for the kernel density estimate
+            Size of the quality score bins used to compute the frequency histogram
         * sample: INT [Default 100000]
-            If given, a n number of reads will be randomly selected instead of the entire dataframe
+            Unused, kept for backward compatibility. The histogram is computed over all the reads
         * min_qual, max_qual: INT or None [Default None]
             Minimal and maximal read quality cut-offs for the plot
         * min_freq, max_freq: INT or None [Default None]
@@ -378,18 +544,20 @@ class pycoQC():
             A fig + axes tuple for further user customisation (http://matplotlib.org/api/axes_api.html)
         """
 
-        # Select reads
-        df = self.df[["mean_qscore"]]
-        first_decile, median, last_decile = np.percentile(df["mean_qscore"], [10,50,90])
-        if sample and len(df) > sample:
-            df = df.sample(sample)
+        # Compute the distribution stats and the frequency histogram in single numpy passes over
+        # the cached contiguous array. This is cheap enough to use all the reads rather than a
+        # random sample
+        values = self._qscore
+        first_decile, median, last_decile = np.percentile(values, [10,50,90])
+        upper = max_qual if max_qual else values.max()
+        counts, edges = np.histogram(values, bins=np.arange(min_qual, upper+bandwith, bandwith))
+        counts = counts/(counts.sum()*bandwith)
 
         with pl.style.context(plot_style):
             fig, ax = pl.subplots(figsize=figsize)
 
-            # Plot the kde graph
-            sns.kdeplot(df["mean_qscore"], ax=ax, color=color, alpha=alpha, gridsize=250, legend=False,
-                bw=bandwith, cut=0, shade=True)
+            # Plot the precomputed histogram
+            ax.fill_between(edges[:-1], counts, step="post", color=color, alpha=alpha)
 
             # Extract limits for lines
             ymin, ymax = ax.get_ylim()
@@ -431,7 +599,7 @@ class pycoQC():
         plot_style = "ggplot",
         **kwargs):
         """
-        Plot the univariate kernel density estimate of read length in base pairs
+        Plot the distribution of read length in base pairs
         * figsize: LIST [Default [30,7]]
             Size of ploting area
         * color: STR [Default "orangered"]
@@ -440,9 +608,9 @@ class pycoQC():
         * alpha: FLOAT [Default 0.5 0.5]
             Opacity of the area from 0 to 1
         * bandwith: FLOAT [Default 0.1]
-            Size of the quality score bandwith for the kernel density estimate
+            Size of the read length bins used to compute the frequency histogram
         * sample:INT [Default 100000]
-            If given, a n number of reads will be randomly selected instead of the entire dataframe
+            Unused, kept for backward compatibility. The histogram is computed over all the reads
         * min_len, max_len: INT or None [Default None]
             Minimal and maximal read length cut-offs for the plot
         * min_freq, max_freq: INT or None [Default None]
@@ -455,27 +623,35 @@ class pycoQC():
             A fig + axes tuple for further user customisation (http://matplotlib.org/api/axes_api.html)
         """
 
-        # Select reads
-        df = self.df[["num_bases"]]
-        first_decile, median, last_decile = np.percentile(df["num_bases"], [10,50,90])
-        if sample and len(df) > sample:
-            df = df.sample(sample)
+        # Compute the distribution stats in a numpy pass over the cached contiguous array
+        values = self._seqlen
+        first_decile, median, last_decile = np.percentile(values, [10,50,90])
 
         # Autocorect
         if xlog and min_len <=0:
             min_len = 1
         if not max_len:
-            max_len = df["num_bases"].max()
+            max_len = self._seqlen_max
         if not bandwith:
             bandwith = (max_len-min_len)//100
             if bandwith >= 200: bandwith = 200
             if bandwith <= 10: bandwith = 10
 
+        # Use log spaced bins on a log scaled x axis so the bins keep an even apparent width.
+        # min_len was corrected above, so log10 never sees 0
+        if xlog:
+            bins = np.logspace(np.log10(min_len), np.log10(max_len), num=int((max_len-min_len)//bandwith)+1)
+        else:
+            bins = np.arange(min_len, max_len+bandwith, bandwith)
+
+        # Compute the frequency histogram in a single numpy pass, cheap enough to avoid sampling
+        counts, edges = np.histogram(values, bins=bins)
+        counts = counts/(counts.sum()*np.diff(edges))
+
         with pl.style.context(plot_style):
             fig, ax = pl.subplots(figsize=figsize)
-            # Plot the kde graph
-            sns.kdeplot(df["num_bases"], ax=ax, color=color, alpha=alpha, gridsize=250, legend=False,
-                bw=bandwith, cut=0, shade=True, clip=(min_len, max_len))
+            # Plot the precomputed histogram
+            ax.fill_between(edges[:-1], counts, step="post", color=color, alpha=alpha)
 
             # Extract limits for lines
             ymin, ymax = ax.get_ylim()
@@ -539,55 +715,56 @@ class pycoQC():
         * cumulative: BOOL [Default False]
             If True,plot a cumulative ditribution instead
         * sample: INT [Default 100000]
-            If given, a n number of reads will be randomly selected instead of the entire dataframe
+            Unused, kept for backward compatibility. The counts are accumulated over all the reads
         * plot_style: STR [default "ggplot"]
             Matplotlib plotting style. See https://matplotlib.org/users/style_sheets.html
         => Return
             A fig + axes tuple for further user customisation (http://matplotlib.org/api/axes_api.html)
         """
 
-        # Slice the main dataframe and sample if needed
+        # Select the values to accumulate per bin from the cached arrays
         if level == "events":
-            if not "num_events" in self.df:
+            if self._num_events is None:
                 jprint ("events number information not available in the source file")
                 return (None, None)
-            else:
-                df = self.df[["start_time", "num_events"]].copy()
-                df.rename(columns={"num_events":"count"}, inplace=True)
+            weights = self._num_events
         elif level == "bases":
-            df = self.df[["start_time", "num_bases"]].copy()
-            df.rename(columns={"num_bases":"count"}, inplace=True)
+            weights = self._seqlen
         elif level == "reads":
-            df = self.df[["start_time"]].copy()
-            df["count"]=1
-        if sample and len(df) > sample:
-            df = df.sample(sample)
-
-        # Discretize start time, group by discrete start time and count the number of reads/bases/events
-        bin_number = int(self.df["start_time"].max()//bin_size)+1
-        bin_counts = np.zeros (bin_number, dtype=np.int)
-        df["start_time"] = df["start_time"]//bin_size
-        df["start_time"]= df["start_time"].astype(int)
-        for bin_start, bin_df in df.groupby("start_time"):
-            bin_counts[bin_start] = bin_df["count"].sum()
+            weights = None
+
+        bin_number = int(self._start_time.max()//bin_size)+1
+
+        # For large runs fuse the start time discretization and the per bin accumulation in a
+        # compiled parallel numba kernel if available. The threshold keeps small runs clear of the
+        # kernel compilation cost
+        bin_counts = None
+        if len(self._start_time) > 100000:
+            try:
+                kernel = _get_numba_bin_counts()
+                bin_counts = kernel(self._start_time,
+                    weights if weights is not None else self._start_time,
+                    np.float32(bin_size), bin_number, weights is not None)
+            except ImportError:
+                pass
+
+        # Otherwise discretize then accumulate with a single weighted bincount pass
+        if bin_counts is None:
+            bins = (self._start_time//bin_size).astype(np.int32)
+            if weights is None:
+                bin_counts = np.bincount(bins, minlength=bin_number)
+            else:
+                bin_counts = np.bincount(bins, weights=weights, minlength=bin_number)
 
-        # Convert results to Series
-        lab = [i*bin_size/3600 for i in range (bin_number)]
-        s = pd.Series(data=bin_counts, index=lab, name="count")
+        s = pd.Series(data=bin_counts, index=np.arange(bin_number)*bin_size/3600, name="count")
 
         # Transform to a cumulative distribution
         if cumulative:
-            cumsum=0
-            for i, val in s.items():
-                cumsum += val
-                s[i] = cumsum
+            s = s.cumsum()
 
         # Smooth using a moving mean
         if bin_smothing:
-            queue = deque([], maxlen=bin_smothing)
-            for i, val in s.items():
-                queue.append(val)
-                s[i] = np.mean(queue)
+            s = s.rolling(window=bin_smothing, min_periods=1).mean()
 
         with pl.style.context(plot_style):
             # Plot the graph
@@ -637,23 +814,34 @@ class pycoQC():
             A matplotlib fig + axes tuple for further user customisation (http://matplotlib.org/api/axes_api.html)
         """
 
-        # Slice the main dataframe
-        df = self.df[["start_time", "mean_qscore"]].copy()
-        df["start_time"] = df["start_time"]/3600
-        bins = np.arange(0, max(df["start_time"])+win_size, win_size)
-        df["start_time"] = pd.cut(df["start_time"], bins)
-
-        # Compute the mean, min and max for each win_size interval
-        df2 = pd.DataFrame(columns=["median", "min", "max", "q1", "q3"])
-        for index, sdf in df.groupby("start_time"):
-            df2.loc[index.left, "median"] = sdf["mean_qscore"].median()
-            df2.loc[index.left, "min"] = sdf["mean_qscore"].min()
-            df2.loc[index.left, "max"] = sdf["mean_qscore"].max()
-            df2.loc[index.left, "q1"] = sdf["mean_qscore"].quantile(0.25)
-            df2.loc[index.left, "q3"] = sdf["mean_qscore"].quantile(0.75)
-
-        # If you don't cast to numeric fill_between throws an exception
-        df2 = df2.apply(pd.to_numeric)
+        # Assign each read to a discrete time window
+        bin_id = np.floor(self._start_time_h/win_size).astype(np.int32)
+
+        # For very large runs delegate to a compiled numba kernel if available. It replaces the
+        # per window sorts of groupby.quantile with one global sort and a linear pass per window
+        df2 = None
+        if len(bin_id) > 1000000:
+            try:
+                bin_stats = _get_numba_bin_stats()
+                order = np.argsort(bin_id, kind="stable")
+                offsets = np.searchsorted(bin_id[order], np.arange(bin_id.max()+2))
+                df2 = pd.DataFrame(bin_stats(self._qscore[order], offsets),
+                    columns=["median", "min", "max", "q1", "q3"])
+            except ImportError:
+                pass
+
+        # Otherwise compute the statistics for all the windows with vectorized groupby passes
+        if df2 is None:
+            q = pd.Series(self._qscore).groupby(bin_id)
+            df2 = pd.concat ([
+                q.agg(["median", "min", "max"]),
+                q.quantile([0.25, 0.75]).unstack(level=-1).rename(columns={0.25:"q1", 0.75:"q3"})],
+                axis=1)
+            # Reintroduce empty windows as missing values
+            df2 = df2.reindex(np.arange(bin_id.max()+1))
+
+        # Scale the index back to hours
+        df2.index = df2.index*win_size
 
         with pl.style.context(plot_style):
             # Plot the graph
@@ -728,16 +916,20 @@ class pycoQC():
         => Return
             A seaborn JointGrid object containing the plot (http://seaborn.pydata.org/generated/seaborn.JointGrid.html)
         """
-        # Filter out reads out of select boundaries
+        # Filter out reads out of select boundaries with a single compound expression evaluated
+        # by DataFrame.eval (fused by numexpr when available) instead of one frame copy per cut-off
         df = self.df[["num_bases", "mean_qscore"]]
+        expr = []
         if min_len:
-            df = df[(df["num_bases"] >= min_len)]
+            expr.append("num_bases >= @min_len")
         if max_len:
-            df = df[(df["num_bases"] <= max_len)]
+            expr.append("num_bases <= @max_len")
         if min_qual:
-            df = df[(df["mean_qscore"] >= min_qual)]
+            expr.append("mean_qscore >= @min_qual")
         if max_qual:
-            df = df[(df["mean_qscore"] <= max_qual)]
+            expr.append("mean_qscore <= @max_qual")
+        if expr:
+            df = df[df.eval(" & ".join(expr))]
         if sample and len(df) > sample:
             df = df.sample(sample)
 